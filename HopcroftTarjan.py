@@ -5,6 +5,8 @@ This program implements test of the Hopcroft-Tarjan algorithm for
 finding articulation points in a graph.
 """
 
+from array import array
+
 from graph import Graph
 
 def HopcroftTarjan():
@@ -24,38 +26,62 @@ def HopcroftTarjan():
 
 def findArticulationPoints(g):
     """Returns a list of the articulation points in the graph."""
-    nodes = g.getNodes()
-    for node in nodes:
-        node.visited = False
-        node.parent = None
-    cutpoints = []
-    applyHopcroftTarjan(nodes[0], 0, cutpoints)
-    return cutpoints
-
-def applyHopcroftTarjan(start, depth, cutpoints):
-    """Recursively adds articulation points to the cutpoints list."""
-    start.visited = True
-    start.depth = depth
-    start.low = depth
-    isCutPoint = False
-    neighbors = start.getNeighbors()
-    print(start, neighbors)
-    children = 0
-    for node in neighbors:
-        if not node.visited:
-            node.parent = start
-            # print(start)
-            applyHopcroftTarjan(node, depth + 1, cutpoints)
-            children += 1
-            if node.low >= start.depth:
-                isCutPoint = True
-            start.low = min(start.low, node.low)
-        elif node != start.parent:
-            start.low = min(start.low, node.depth)
-    if start.parent is None:
-        isCutPoint = children > 1
-    if isCutPoint:
-        cutpoints.append(start)
+    indptr, indices, nodes = g.toCSR()
+    isCutPoint = applyHopcroftTarjanCSR(indptr, indices, 0)
+    return [ nodes[i] for i, flag in enumerate(isCutPoint) if flag ]
+
+def applyHopcroftTarjanCSR(indptr, indices, root):
+    """
+    Finds the articulation points reachable from root in a graph given
+    in the compressed sparse row form produced by Graph.toCSR.  The
+    result is a bytearray in which entry i is 1 if node i is an
+    articulation point.  The depth-first search is driven by an explicit
+    stack rather than by recursion, so the depth of the graph is not
+    limited by the Python recursion limit.  All of its state is kept in
+    integer arrays indexed by node, so the inner loop reads the
+    contiguous indices array instead of following Node and Arc objects.
+    The stack holds node indices, and the position of each node's next
+    neighbor is kept in nextPos, so all of the storage is allocated
+    before the loop starts.
+    """
+    n = len(indptr) - 1
+    depth = array("i", [ -1 ]) * n
+    low = array("i", [ 0 ]) * n
+    parent = array("i", [ -1 ]) * n
+    children = array("i", [ 0 ]) * n
+    isCutPoint = bytearray(n)
+    nextPos = array("i", indptr[:n])
+    stack = array("i", [ 0 ]) * n
+    depth[root] = 0
+    low[root] = 0
+    stack[0] = root
+    top = 0
+    while top >= 0:
+        u = stack[top]
+        pos = nextPos[u]
+        if pos < indptr[u + 1]:
+            nextPos[u] = pos + 1
+            v = indices[pos]
+            if depth[v] < 0:
+                parent[v] = u
+                depth[v] = low[v] = depth[u] + 1
+                top += 1
+                stack[top] = v
+            elif v != parent[u]:
+                if depth[v] < low[u]:
+                    low[u] = depth[v]
+        else:
+            top -= 1
+            p = parent[u]
+            if p < 0:
+                isCutPoint[u] = children[u] > 1
+            else:
+                children[p] += 1
+                if low[u] >= depth[p]:
+                    isCutPoint[p] = 1
+                if low[u] < low[p]:
+                    low[p] = low[u]
+    return isCutPoint
 
 # Startup code
 
@@ -22,7 +22,45 @@ these methods to create objects of the appropriate subclass.
 """
 
 import io
+import re
 import tokenize
+from array import array
+from operator import attrgetter
+
+# Implementation notes: Line and option patterns
+# ----------------------------------------------
+# Nearly every line in a graph file is a simple node or arc
+# specification, which these precompiled patterns recognize in a
+# single match.  Anything they do not recognize, such as numeric
+# names, escaped strings, or comments, is handed to the tokenize
+# module, which implements the full grammar.
+
+_NAME = r"""[^\W\d]\w*|\d+|"[^"\\]*"|'[^'\\]*'"""
+
+_LINE_PATTERN = re.compile(r"""
+    (?P<v1>{0})\s*
+    (?:(?P<op>->|-)\s*(?P<v2>{0})\s*)?
+    (?:\((?P<options>.*)\)\s*)?$""".format(_NAME), re.VERBOSE)
+
+_OPTION_PATTERN = re.compile(r"""
+    \s*(?P<name>[^\W\d]\w*|"[^"\\]*"|'[^'\\]*')\s*=\s*
+    (?:(?P<sign>-)\s*)?
+    (?:(?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+      |(?P<string>"[^"\\]*"|'[^'\\]*')
+      |(?P<word>[^\W\d]\w*))
+    \s*(?:,|$)""", re.VERBOSE)
+
+# Implementation notes: Sort keys
+# -------------------------------
+# The lists returned by the getters are sorted using these key
+# functions, which produce the same order as the comparison operators
+# defined by Node and Arc.  Comparing the keys uses the built-in string
+# and tuple comparisons and never calls the Python-level __lt__.
+
+_nodeKey = attrgetter("_name")
+
+def _arcKey(arc):
+    return (arc._start._name, arc._finish._name, id(arc))
 
 class Graph:
     """Defines a graph as a set of nodes and a set of arcs."""
@@ -34,7 +72,9 @@ class Graph:
     def clear(self):
         """Removes all the nodes and arcs from the graph."""
         self._nodes = { }
-        self._arcs = set()
+        self._arcs = [ ]
+        self._nodesSorted = None
+        self._arcsSorted = None
 
     def addNode(self, arg):
         """
@@ -46,14 +86,25 @@ class Graph:
         The addNode method returns the Node object.
         """
         if type(arg) is str:
-            node = self.getNode(arg)
-            if node is None:
-                node = self.createNode(arg)
+            return self._addNodeByName(arg)
         elif isinstance(arg, Node):
             node = arg
         else:
             raise ValueError("Illegal node specification")
         self._nodes[node.getName()] = node
+        self._nodesSorted = None
+        return node
+
+    def _addNodeByName(self, name):
+        """
+        Implements addNode for a node specified by name.  The load
+        method calls this directly, because it always has a string.
+        """
+        node = self._nodes.get(name)
+        if node is None:
+            node = self.createNode(name)
+            self._nodes[node.getName()] = node
+            self._nodesSorted = None
         return node
 
     def removeNode(self, arg):
@@ -76,6 +127,7 @@ class Graph:
         for arc in node.getArcsTo():
             self.removeArc(arc)
         del self._nodes[node.getName()]
+        self._nodesSorted = None
 
     def addArc(self, arg1, arg2=None):
         """
@@ -93,7 +145,12 @@ class Graph:
             start = self.addNode(arg1)
             finish = self.addNode(arg2)
             arc = self.createArc(start, finish)
-        self._arcs.add(arc)
+        index = arc._graphIndex
+        if 0 <= index < len(self._arcs) and self._arcs[index] is arc:
+            return arc
+        arc._graphIndex = len(self._arcs)
+        self._arcs.append(arc)
+        self._arcsSorted = None
         arc.getStart()._addArcFrom(arc)
         arc.getFinish()._addArcTo(arc)
         return arc
@@ -104,21 +161,61 @@ class Graph:
         internal to each of its endpoint nodes.  This method raises
         a keyError exception if the arc does not exist.
         """
-        self._arcs.remove(arc)
+        index = arc._graphIndex
+        if not 0 <= index < len(self._arcs) or self._arcs[index] is not arc:
+            raise KeyError(arc)
+        last = self._arcs.pop()
+        if last is not arc:
+            self._arcs[index] = last
+            last._graphIndex = index
+        arc._graphIndex = -1
+        self._arcsSorted = None
         arc.getStart()._removeArcFrom(arc)
         arc.getFinish()._removeArcTo(arc)
+        if arc._reverse is not None:
+            arc._reverse._reverse = None
+            arc._reverse = None
 
     def getNode(self, name):
         """Returns the node with the specified name, or None."""
         return self._nodes.get(name)
 
     def getNodes(self):
-        """Returns a sorted list of all the nodes in the graph."""
-        return [ node for node in sorted(self._nodes.values()) ]
+        """
+        Returns a sorted list of all the nodes in the graph.  The list
+        is cached until the graph changes and must not be modified.
+        """
+        if self._nodesSorted is None:
+            self._nodesSorted = sorted(self._nodes.values(), key=_nodeKey)
+        return self._nodesSorted
 
     def getArcs(self):
-        """Returns a sorted list of all the arcs in the graph."""
-        return [ arc for arc in sorted(self._arcs) ]
+        """
+        Returns a sorted list of all the arcs in the graph.  The list
+        is cached until the graph changes and must not be modified.
+        """
+        if self._arcsSorted is None:
+            self._arcsSorted = sorted(self._arcs, key=_arcKey)
+        return self._arcsSorted
+
+    def toCSR(self):
+        """
+        Returns the adjacency of the graph in compressed sparse row form
+        as a tuple (indptr, indices, nodes).  Each node is identified by
+        its index in the sorted list nodes.  The neighbors of node i are
+        indices[indptr[i]:indptr[i + 1]], and both indptr and indices are
+        arrays of C ints.  The arrays are a snapshot that does not track
+        later changes to the graph.
+        """
+        nodes = self.getNodes()
+        ids = { node: i for i, node in enumerate(nodes) }
+        indptr = array("i", [ 0 ])
+        indices = array("i")
+        for node in nodes:
+            for neighbor in node.getNeighbors():
+                indices.append(ids[neighbor])
+            indptr.append(len(indices))
+        return indptr, indices, nodes
 
     def load(self, file):
         """
@@ -143,6 +240,53 @@ class Graph:
             else:
                 raise SyntaxError("Illegal node name in " + token.line)
 
+        def unquote(name):
+            if name is not None and name[0] in "\"'":
+                return name[1:-1]
+            return name
+
+        def tokenizeLine(line):
+            source = io.BytesIO(line.encode("utf-8"))
+            tokenizer = tokenize.tokenize(source.readline)
+            token = next(tokenizer)
+            if token.type == tokenize.ENCODING:
+                token = next(tokenizer)
+            name1 = scanNodeName(token)
+            name2 = None
+            token = next(tokenizer)
+            op = token.string
+            if op == "-" or op == "->":
+                name2 = scanNodeName(next(tokenizer))
+                token = next(tokenizer)
+            else:
+                op = None
+            options = None
+            if token.string == "(":
+                p1 = token.end[1]
+                p2 = line.rfind(")")
+                options = line[p1:p2]
+            return name1, op, name2, options
+
+        def addLine(name1, op, name2, options):
+            pairs = [ ]
+            if options is not None:
+                pairs = Graph._parseOptions(options)
+            v1 = self._addNodeByName(name1)
+            if op is None:
+                for name, value in pairs:
+                    setattr(v1, name, value)
+            else:
+                v2 = self._addNodeByName(name2)
+                arc = self.addArc(self.createArc(v1, v2))
+                for name, value in pairs:
+                    setattr(arc, name, value)
+                if op == "-":
+                    rev = self.addArc(self.createArc(v2, v1))
+                    for name, value in pairs:
+                        setattr(rev, name, value)
+                    arc._reverse = rev
+                    rev._reverse = arc
+
         if isinstance(file, str):
             with open(file) as f:
                 self.load(f)
@@ -150,35 +294,16 @@ class Graph:
             for line in file:
                 line = line.strip()
                 if line != "" and not line.startswith("#"):
-                    source = io.BytesIO(line.encode("utf-8"))
-                    tokenizer = tokenize.tokenize(source.readline)
-                    token = next(tokenizer)
-                    if token.type == tokenize.ENCODING:
-                        token = next(tokenizer)
-                    v1 = self.addNode(scanNodeName(token))
-                    token = next(tokenizer)
-                    op = token.string
-                    if op == "-" or op == "->":
-                        v2 = self.addNode(scanNodeName(next(tokenizer)))
-                        token = next(tokenizer)
-                    else:
-                        op = None
-                    options = None
-                    if token.string == "(":
-                        p1 = token.end[1]
-                        p2 = line.rfind(")")
-                        options = line[p1:p2]
-                    if op is None:
-                        if options is not None:
-                            Graph.scanOptions(v1, options)
+                    match = _LINE_PATTERN.match(line)
+                    if match is None:
+                        try:
+                            addLine(*tokenizeLine(line))
+                        except tokenize.TokenError as ex:
+                            raise SyntaxError(ex.args[0] + " in " + line)
                     else:
-                        arc = self.addArc(v1, v2)
-                        if options is not None:
-                            Graph.scanOptions(arc, options)
-                        if op == "-":
-                            arc = self.addArc(v2, v1)
-                            if options is not None:
-                                Graph.scanOptions(arc, options)
+                        addLine(unquote(match.group("v1")), match.group("op"),
+                                unquote(match.group("v2")),
+                                match.group("options"))
 
 # Implementation notes: Factory methods
 # -------------------------------------
@@ -214,12 +339,53 @@ class Graph:
         -2, filled to the Python Boolean constant True, and label to
         the string "my label".
         """
+        for name, value in Graph._parseOptions(options):
+            setattr(obj, name, value)
+
+    @staticmethod
+    def _parseOptions(options):
+        """
+        Parses the options string and returns a list of (name, value)
+        pairs, so that one option string can be applied to several
+        objects without being scanned again.
+        """
+        pairs = [ ]
+        pos = 0
+        while pos < len(options):
+            match = _OPTION_PATTERN.match(options, pos)
+            if match is None:
+                return Graph._parseOptionTokens(options)
+            pos = match.end()
+            name = match.group("name")
+            if name[0] in "\"'":
+                name = name[1:-1]
+            sign = -1 if match.group("sign") else 1
+            if match.group("number") is not None:
+                number = match.group("number")
+                if "." in number or "e" in number or "E" in number:
+                    value = sign * float(number)
+                else:
+                    value = sign * int(number)
+            elif match.group("string") is not None:
+                value = match.group("string")[1:-1]
+            else:
+                value = Graph._scanConstant(match.group("word"), sign, options)
+            pairs.append((name, value))
+        return pairs
+
+    @staticmethod
+    def _parseOptionTokens(options):
+        """
+        Implements _parseOptions using the tokenize module, which handles
+        the option strings that the precompiled pattern does not.
+        """
+        pairs = [ ]
         source = io.BytesIO(options.encode("utf-8"))
         tokenizer = tokenize.tokenize(source.readline)
         token = next(tokenizer)
         if token.type == tokenize.ENCODING:
             token = next(tokenizer)
-        while token.type != tokenize.ENDMARKER:
+        while token.type not in (tokenize.NEWLINE, tokenize.ENDMARKER):
             if token.type == tokenize.NAME:
                 name = token.string
             elif token.type == tokenize.STRING:
@@ -235,27 +401,33 @@ class Graph:
                 sign = -1
                 token = next(tokenizer)
             if token.type == tokenize.NAME:
-                lc = token.string.lower()
-                if lc == "false":
-                    value = False
-                elif lc == "true":
-                    value = True
-                elif lc == "none":
-                    value = None
-                elif lc == "inf":
-                    value = sign * float("inf")
-                else:
-                    raise SyntaxError("Illegal option value: " + options)
+                value = Graph._scanConstant(token.string, sign, options)
             elif token.type == tokenize.STRING:
                 value = eval(token.string)
             elif token.type == tokenize.NUMBER:
                 value = sign * eval(token.string)
             else:
                 raise SyntaxError("Illegal option value: " + options)
-            setattr(obj, name, value)
+            pairs.append((name, value))
             token = next(tokenizer)
             if token.string == ",":
                 token = next(tokenizer)
+        return pairs
+
+    @staticmethod
+    def _scanConstant(word, sign, options):
+        """Returns the value of one of the named option constants."""
+        lc = word.lower()
+        if lc == "false":
+            return False
+        elif lc == "true":
+            return True
+        elif lc == "none":
+            return None
+        elif lc == "inf":
+            return sign * float("inf")
+        else:
+            raise SyntaxError("Illegal option value: " + options)
 
 # Overload standard methods
 
@@ -279,14 +451,24 @@ class Graph:
 # identified by a unique name.  Each Node object includes a list
 # of the arcs that begin at that node.  The base class for Node
 # defines no additional attributes.
+#
+# Node and Arc declare __slots__ for their internal fields, which
+# keeps each object small and makes those fields fast to access.  The
+# __dict__ slot remains so that clients and scanOptions can still
+# assign arbitrary attributes.
 
 class Node:
 
+    __slots__ = ("_name", "_arcsFrom", "_arcsTo", "_arcsFromSorted",
+                 "_arcsToSorted", "_neighborsSorted", "__dict__")
+
     def __init__(self, name):
         """Creates a node with the specified name."""
         self._name = name
-        self._arcsFrom = set()
-        self._arcsTo = set()
+        self._arcsFrom = [ ]
+        self._arcsTo = [ ]
+        self._invalidateArcsFrom()
+        self._invalidateArcsTo()
 
     def getName(self):
         """Returns the name of this node."""
@@ -297,20 +479,42 @@ class Node:
         return self.getArcsFrom()
 
     def getArcsFrom(self):
-        """Returns a list of all the arcs leaving this node."""
-        return [ arc for arc in sorted(self._arcsFrom) ]
+        """
+        Returns a sorted list of all the arcs leaving this node.  The list
+        is cached until the arcs change and must not be modified.
+        """
+        if self._arcsFromSorted is None:
+            self._arcsFromSorted = sorted(self._arcsFrom, key=_arcKey)
+        return self._arcsFromSorted
 
     def getArcsTo(self):
-        """Returns a list of all the arcs ending at this node."""
-        return [ arc for arc in sorted(self._arcsTo) ]
+        """
+        Returns a sorted list of all the arcs ending at this node.  The
+        list is cached until the arcs change and must not be modified.
+        """
+        if self._arcsToSorted is None:
+            self._arcsToSorted = sorted(self._arcsTo, key=_arcKey)
+        return self._arcsToSorted
 
     def getNeighbors(self):
-        """Returns a list of all the nodes to which at least one arc exists."""
-        targets = set()
-        for arc in self._arcsFrom:
-            targets.add(arc.getFinish())
-            print(targets)
-        return [ node for node in sorted(targets) ]
+        """
+        Returns a sorted list of all the nodes to which at least one arc
+        exists.  The list is cached until the arcs change and must not
+        be modified.
+        """
+        if self._neighborsSorted is None:
+            targets = set()
+            for arc in self._arcsFrom:
+                targets.add(arc.getFinish())
+            self._neighborsSorted = sorted(targets, key=_nodeKey)
+        return self._neighborsSorted
+
+    def iterArcsFrom(self):
+        """
+        Returns an iterator over the arcs leaving this node in no
+        particular order, which avoids the sort done by getArcsFrom.
+        """
+        return iter(self._arcsFrom)
 
     def isConnectedTo(self, node):
         """Returns True if any arcs connect to node."""
@@ -319,31 +523,74 @@ class Node:
                 return True
         return False
 
+# Implementation notes: Arc lists
+# -------------------------------
+# The arcs of a graph and the arcs into and out of each node are kept
+# in lists rather than sets, so iterating over them walks contiguous
+# memory in insertion order.  Each arc records its position in each
+# of the three lists that contain it.  An arc is removed by moving the
+# last arc of the list into its position, which takes constant time.
+
 # Package methods called only by the Graph class
 
     def _addArcFrom(self, arc):
         """Adds an arc that starts at this node."""
         if arc.getStart() is not self:
             raise ValueError("Arc must start at the specified node")
-        self._arcsFrom.add(arc)
+        index = arc._fromIndex
+        if 0 <= index < len(self._arcsFrom) and self._arcsFrom[index] is arc:
+            return
+        arc._fromIndex = len(self._arcsFrom)
+        self._arcsFrom.append(arc)
+        self._invalidateArcsFrom()
 
     def _addArcTo(self, arc):
         """Adds an arc that finishes at this node."""
         if arc.getFinish() is not self:
             raise ValueError("Arc must end at the specified node")
-        self._arcsTo.add(arc)
+        index = arc._toIndex
+        if 0 <= index < len(self._arcsTo) and self._arcsTo[index] is arc:
+            return
+        arc._toIndex = len(self._arcsTo)
+        self._arcsTo.append(arc)
+        self._invalidateArcsTo()
 
     def _removeArcFrom(self, arc):
         """Removes an arc that starts at this node."""
         if arc.getStart() is not self:
             raise ValueError("Arc must start at the specified node")
-        self._arcsFrom.remove(arc)
+        index = arc._fromIndex
+        if not 0 <= index < len(self._arcsFrom) or \
+           self._arcsFrom[index] is not arc:
+            raise KeyError(arc)
+        last = self._arcsFrom.pop()
+        if last is not arc:
+            self._arcsFrom[index] = last
+            last._fromIndex = index
+        self._invalidateArcsFrom()
 
     def _removeArcTo(self, arc):
         """Removes an arc that finishes at this node."""
         if arc.getFinish() is not self:
             raise ValueError("Arc must end at the specified node")
-        self._arcsTo.remove(arc)
+        index = arc._toIndex
+        if not 0 <= index < len(self._arcsTo) or \
+           self._arcsTo[index] is not arc:
+            raise KeyError(arc)
+        last = self._arcsTo.pop()
+        if last is not arc:
+            self._arcsTo[index] = last
+            last._toIndex = index
+        self._invalidateArcsTo()
+
+    def _invalidateArcsFrom(self):
+        """Discards the cached sorted lists derived from _arcsFrom."""
+        self._arcsFromSorted = None
+        self._neighborsSorted = None
+
+    def _invalidateArcsTo(self):
+        """Discards the cached sorted list derived from _arcsTo."""
+        self._arcsToSorted = None
 
 # Overload standard methods
 
@@ -390,14 +637,23 @@ class Node:
 # The Arc class represents a directed arc from one node to another.
 # Clients can add attributes to an arc either by direct assignment
 # or by creating a subclass with the appropriate getters and setters.
+# The two arcs that load creates for an undirected arc are linked to
+# each other so that getReverse can find the twin in constant time.
 
 class Arc:
     """This class defines a directed arc from one node to another."""
 
+    __slots__ = ("_start", "_finish", "_reverse", "_graphIndex",
+                 "_fromIndex", "_toIndex", "__dict__")
+
     def __init__(self, start, finish):
         """Creates an arc from start to finish."""
         self._start = start
         self._finish = finish
+        self._reverse = None
+        self._graphIndex = -1
+        self._fromIndex = -1
+        self._toIndex = -1
 
     def getStart(self):
         """Returns the node at the start of the arc."""
@@ -407,6 +663,13 @@ class Arc:
         """Returns the node at the end of the arc."""
         return self._finish
 
+    def getReverse(self):
+        """
+        Returns the arc running in the opposite direction that was
+        created along with this one for an undirected arc, or None.
+        """
+        return self._reverse
+
 # Overload standard methods
 
     def __str__(self):
@@ -19,13 +19,12 @@ def traverse():
             filename += ".txt"
         g.clear()
         g.load(filename)   
-        available = g.getArcs()
-        nodes = g.getNodes()
+        arcs = g.getArcs()
+        available = set(arcs)
         if checkIfEuler(g) == False:
             print("No such path exists")
-        for starting_point in available:
-            newList=available.copy()
-            traverseAll(g, newList,starting_point, [])  
+        for starting_point in arcs:
+            traverseAll(g, available, starting_point, [])
 
 def checkIfEuler(graph):
     '''
@@ -42,50 +41,31 @@ def checkIfEuler(graph):
     else:
         return True
 
-
-def removeFullArc(graph,arc,unvisited):
-    '''
-    Removes the full undirected arc from a given list
-    '''
-    rev = removeReverseArc(graph,arc,unvisited)
-    unvisited.remove(arc)
-
-
-def removeReverseArc(graph,arc,unvisited):
-    '''
-    Removes an arc going the opposing direction of the input
-    (helper for removing an undirected arc)
-    '''
-    for rev in unvisited:
-        if rev.getStart() == arc.getFinish() and rev.getFinish() == arc.getStart():
-            unvisited.remove(rev)
-            break;
-
 def traverseAll(graph,unvisited,start, path):
     '''
-    Creates a list of unvisited arcs and recursively calls itself
-    on a smaller list of unvisited. If it doesn't have any more
-    arcs that meet the condition of having a matching end point 
-    for the next arc to start from, it moves on.
+    Walks start (and its reverse arc) and recursively calls itself
+    on each unvisited arc leaving the end of start, printing the
+    path once every arc has been walked. The unvisited set and the
+    path are shared by every call: each call removes its arcs on the
+    way down and puts them back before returning.
     '''
-    removeFullArc(graph,start,unvisited)
-    if unvisited == []:
-        if path[-1].getFinish() == start.getStart():
-            path.append(start)
-            print(path)
-            return path
-        else:
-            return []
     #Checks if the last item's endpoint is the same as your start point's beginnign
-    if path == [] or path[-1].getFinish() == start.getStart():
-        path.append(start)
-        for neighbor in start.getFinish().getArcsFrom():
-            if neighbor in unvisited:
-                newList=unvisited.copy()
-                # print(neighbor, newList)
-                traverseAll(graph, newList, neighbor,path)
-    else:
+    if path != [] and path[-1].getFinish() != start.getStart():
         return False
+    rev = start.getReverse()
+    unvisited.discard(start)
+    unvisited.discard(rev)
+    path.append(start)
+    if len(unvisited) == 0:
+        print(path)
+    else:
+        for neighbor in start.getFinish().iterArcsFrom():
+            if neighbor in unvisited:
+                traverseAll(graph, unvisited, neighbor, path)
+    path.pop()
+    unvisited.add(start)
+    if rev is not None:
+        unvisited.add(rev)
     
 # Startup code
 